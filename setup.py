@@ -15,4 +15,7 @@ setup(
         'eth-account>=0.12.2',
         'logmon @ git+https://zxcode.xyz/pub/logmon.git@73c1bfe9',
     ],
+    extras_require={
+        'fast': ['orjson'],
+    },
 )
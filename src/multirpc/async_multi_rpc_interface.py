@@ -1,13 +1,13 @@
 import asyncio
 import logging
-from typing import Union, Dict, Optional
+from typing import Union, Dict, Optional, List
 
 from eth_typing import Address, ChecksumAddress
 from web3._utils.contracts import encode_transaction_data  # noqa
 from web3.types import BlockData, BlockIdentifier, TxReceipt
 
 from . import BaseMultiRpc
-from .base_multi_rpc_interface import BaseContractFunction
+from .base_multi_rpc_interface import BaseContractFunction, BaseBoundContractFunction
 from .constants import ViewPolicy
 from .exceptions import DontHaveThisRpcType
 from .gas_estimation import GasEstimation, GasEstimationMethod
@@ -33,23 +33,22 @@ class AsyncMultiRpc(BaseMultiRpc):
             enable_gas_estimation: bool = False,
             is_proof_authority: bool = False,
             multicall_custom_address: str = None,
-            log_level: logging = logging.WARN
+            log_level: logging = logging.WARN,
+            pool_size: Optional[int] = None,
     ):
         super().__init__(rpc_urls, contract_address, contract_abi, view_policy, gas_estimation, gas_limit,
-                         gas_upper_bound, apm, enable_gas_estimation, is_proof_authority, log_level)
-
-        for func_abi in self.contract_abi:
-            if func_abi.get("stateMutability") in ("view", "pure"):
-                function_type = ContractFunctionType.View
-            elif func_abi.get("type") == "function":
-                function_type = ContractFunctionType.Transaction
-            else:
-                continue
-            self.functions.__setattr__(
-                func_abi["name"],
-                self.ContractFunction(func_abi["name"], func_abi, self, function_type),
-            )
-        asyncio.run(self.setup(multicall_custom_address=multicall_custom_address))
+                         gas_upper_bound, apm, enable_gas_estimation, is_proof_authority, log_level, pool_size)
+
+        self._register_functions(self.ContractFunction)
+        asyncio.run(self._setup_and_release(multicall_custom_address))
+
+    async def _setup_and_release(self, multicall_custom_address: str = None) -> None:
+        # the loop of setup ends with asyncio.run, so the connections it opened must be closed on it. later calls open
+        # new ones on the caller's loop
+        try:
+            await self.setup(multicall_custom_address=multicall_custom_address)
+        finally:
+            await self.close()
 
     async def get_nonce(self, address: Union[Address, ChecksumAddress, str]) -> int:
         return await super()._get_nonce(address)
@@ -63,12 +62,21 @@ class AsyncMultiRpc(BaseMultiRpc):
     async def get_block_number(self) -> int:
         return await super().get_block_number()
 
+    async def call_many(self, funcs: List[BaseBoundContractFunction],
+                        block_identifier: Union[str, int] = 'latest') -> List:
+        return await super().call_many(funcs, block_identifier)
+
+    async def close(self) -> None:
+        return await super().close()
+
     class ContractFunction(BaseContractFunction):
+        __slots__ = ()
+
         def __call__(self, *args, **kwargs):
-            cf = AsyncMultiRpc.ContractFunction(self.name, self.abi, self.mr, self.typ)
-            cf.args = args
-            cf.kwargs = kwargs
-            return cf
+            return AsyncMultiRpc.BoundContractFunction(self, args, kwargs)
+
+    class BoundContractFunction(BaseBoundContractFunction):
+        __slots__ = ()
 
         async def call(
                 self,
@@ -82,21 +90,23 @@ class AsyncMultiRpc(BaseMultiRpc):
                 block_identifier: Union[str, int] = 'latest',
                 enable_gas_estimation: Optional[bool] = None,
         ):
-            if self.mr.providers.get(self.typ) is None:
-                raise DontHaveThisRpcType(f"Doesn't have {self.typ} RPCs")
-            if self.typ == ContractFunctionType.View:
-                return await self.mr._call_view_function(
-                    self.name, block_identifier, *self.args, **self.kwargs,
+            mr = self.function.mr
+            typ = self.function.typ
+            if mr.providers.get(typ) is None:
+                raise DontHaveThisRpcType(f"Doesn't have {typ} RPCs")
+            if typ == ContractFunctionType.View:
+                return await mr._call_view_function(
+                    self.function.name, block_identifier, *self.args, **self.kwargs,
                 )
-            elif self.typ == ContractFunctionType.Transaction:
-                return await self.mr._call_tx_function(
-                    func_name=self.name,
+            elif typ == ContractFunctionType.Transaction:
+                return await mr._call_tx_function(
+                    func_name=self.function.name,
                     func_args=self.args,
                     func_kwargs=self.kwargs,
-                    address=address or self.mr.address,
-                    private_key=private_key or self.mr.private_key,
-                    gas_limit=gas_limit or self.mr.gas_limit,
-                    gas_upper_bound=gas_upper_bound or self.mr.gas_upper_bound,
+                    address=address or mr.address,
+                    private_key=private_key or mr.private_key,
+                    gas_limit=gas_limit or mr.gas_limit,
+                    gas_upper_bound=gas_upper_bound or mr.gas_upper_bound,
                     wait_for_receipt=wait_for_receipt,
                     priority=priority,
                     gas_estimation_method=gas_estimation_method,
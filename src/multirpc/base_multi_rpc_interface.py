@@ -1,16 +1,16 @@
 import asyncio
 import logging
-import time
 from abc import ABC
-from concurrent.futures import ThreadPoolExecutor
-from time import sleep
-from typing import List, Union, Tuple, Coroutine, Dict, Optional, TypeVar, Callable
+from functools import lru_cache
+from itertools import chain
+from operator import itemgetter
+from typing import List, Union, Tuple, Coroutine, Dict, Optional, TypeVar, Callable, Any
 
 import web3
 from eth_account import Account
 from eth_account.datastructures import SignedTransaction
 from eth_account.signers.local import LocalAccount
-from eth_typing import Address, ChecksumAddress
+from eth_typing import Address, ChecksumAddress, HexStr
 from multicallable.async_multicallable import AsyncCall, AsyncMulticall
 from requests import ConnectionError, ReadTimeout, HTTPError
 from web3 import Web3, AsyncWeb3
@@ -19,7 +19,7 @@ from web3.contract import Contract
 from web3.exceptions import TimeExhausted, TransactionNotFound, BlockNotFound
 from web3.types import BlockData, BlockIdentifier, TxReceipt
 
-from .constants import mrpc_cntr, ViewPolicy
+from .constants import mrpc_cntr, ViewPolicy, MulticallSetupTimeout
 from .exceptions import (
     FailedOnAllRPCs,
     TransactionFailedStatus,
@@ -28,9 +28,20 @@ from .exceptions import (
 from .gas_estimation import GasEstimation, GasEstimationMethod
 from .tx_trace import TxTrace
 from .utils import TxPriority, get_span_proper_label_from_provider, get_unix_time, NestedDict, create_web3_from_rpc, \
-    calculate_chain_id, reduce_list_of_list, ResultEvent
+    calculate_chain_id, SharedClientSession, unique_by_endpoint, \
+    ContractFunctionType, RpcBracket, to_checksum_address
 
 T = TypeVar("T")
+_block_number_of = itemgetter(0)  # multicall result is (block_number, block_hash, outputs, metadata)
+
+
+# container of contract functions, filled in by BaseMultiRpc._register_functions
+_Functions = type("functions", (object,), {})
+
+
+@lru_cache(maxsize=32)
+def _account_from_key(private_key: str) -> LocalAccount:
+    return Account.from_key(private_key)
 
 
 class BaseMultiRpc(ABC):
@@ -50,20 +61,22 @@ class BaseMultiRpc(ABC):
             apm=None,
             enable_gas_estimation: bool = False,
             is_proof_authority: bool = False,
-            log_level: logging = logging.WARN
+            log_level: logging = logging.WARN,
+            pool_size: Optional[int] = None,
     ):
         self.rpc_urls = rpc_urls
+        self.pool_size = pool_size
 
         self.gas_estimation = gas_estimation
 
-        self.contract_address = Web3.to_checksum_address(contract_address)
+        self.contract_address = to_checksum_address(contract_address)
         self.contract_abi = contract_abi
         self.apm = apm
 
-        self.contracts: NestedDict = NestedDict({'transaction': None, 'view': None})
+        self.contract: Optional[Contract] = None
         self.multi_calls: NestedDict = NestedDict({'transaction': None, 'view': None})
 
-        self.functions = type("functions", (object,), {})()
+        self.functions = _Functions()
 
         self.view_policy = view_policy
         self.gas_limit = gas_limit
@@ -74,6 +87,10 @@ class BaseMultiRpc(ABC):
         self.private_key = None
         self.chain_id = None
         self.is_proof_authority = is_proof_authority
+        self._session: Optional[SharedClientSession] = None
+        self._fn_abis: Dict[str, Dict] = {}
+        self._brackets: Dict[str, List[RpcBracket]] = {}
+        self._rpc_labels: Dict[int, Tuple[str, str]] = {}  # id(provider) -> (rpc url, span label prefix)
 
         logging.basicConfig(level=log_level)
 
@@ -83,6 +100,20 @@ class BaseMultiRpc(ABC):
         else:
             logging.info(f'params={kwargs}')
 
+    def _register_functions(self, contract_function: type) -> None:
+        """
+        Add a `contract_function` object to `self.functions` for every view and transaction function of the abi.
+        """
+        view, transaction = ContractFunctionType.View, ContractFunctionType.Transaction
+        self.functions.__dict__.update({
+            func_abi["name"]: contract_function(
+                func_abi["name"], func_abi, self,
+                view if func_abi.get("stateMutability") in ("view", "pure") else transaction,
+            )
+            for func_abi in self.contract_abi
+            if func_abi.get("stateMutability") in ("view", "pure") or func_abi.get("type") == "function"
+        })
+
     def set_account(self, address: Union[ChecksumAddress, str], private_key: str) -> None:
         """
         Set public key and private key for sending transactions. If these values set, there is no need to pass address,
@@ -92,49 +123,84 @@ class BaseMultiRpc(ABC):
             private_key: sender private key
         """
         mrpc_cntr.incr_cur_func()
-        self.address = Web3.to_checksum_address(address)
+        self.address = to_checksum_address(address)
         self.private_key = private_key
 
     async def setup(self, multicall_custom_address: str = None) -> None:
         mrpc_cntr.incr_cur_func()
-        self.providers = await create_web3_from_rpc(self.rpc_urls, self.is_proof_authority)
+        pool_size = self.pool_size or sum(len(rpcs) for _, rpcs in self.rpc_urls.items()) * 4
+        self._session = SharedClientSession(limit=pool_size, limit_per_host=min(pool_size, 16))
+        self.providers = await create_web3_from_rpc(self.rpc_urls, self.is_proof_authority, self._session)
         self.chain_id = await calculate_chain_id(self.providers)
 
         if self.gas_estimation is None and self.providers.get('transaction'):
             self.gas_estimation = GasEstimation(
                 self.chain_id,
-                reduce_list_of_list(self.providers['transaction'].values()),
+                list(chain.from_iterable(self.providers['transaction'].values())),
                 # GasEstimationMethod.RPC,
+                http_session=self._session,
             )
 
+        # the contract is only used to encode and decode calls, so it is built (and its abi parsed) once
+        any_provider = next(wb3_v for _, wb3_v in self.providers.items())[0]
+        self.contract = any_provider.eth.contract(self.contract_address, abi=self.contract_abi)
+
+        async def setup_multicall(wb3: AsyncWeb3) -> Optional[AsyncMulticall]:
+            try:
+                mc = AsyncMulticall()
+                await asyncio.wait_for(mc.setup(w3=wb3, custom_address=multicall_custom_address),
+                                       MulticallSetupTimeout)
+                return mc
+            except (ConnectionError, ReadTimeout, asyncio.TimeoutError) as e:
+                # fixme: at least we should retry not ignoring rpc
+                logging.warning(f"Ignore rpc {wb3.provider.endpoint_uri} because of {e}")
+                return None
+
+        brackets = list(self.providers.items())
+        bracket_multi_calls = await asyncio.gather(*[
+            asyncio.gather(*[setup_multicall(wb3) for wb3 in wb3_v]) for _, wb3_v in brackets
+        ])
         is_rpc_provided = False
-        for wb3_k, wb3_v in self.providers.items():  # type: Tuple, List[web3.AsyncWeb3]
-            multi_calls = []
-            contracts = []
-            for wb3 in wb3_v:
-                rpc_url = wb3.provider.endpoint_uri
-                try:
-                    mc = AsyncMulticall()
-                    await mc.setup(w3=wb3, custom_address=multicall_custom_address)
-                    multi_calls.append(mc)
-                    contracts.append(
-                        wb3.eth.contract(self.contract_address, abi=self.contract_abi)
-                    )
-                except (ConnectionError, ReadTimeout, asyncio.TimeoutError) as e:
-                    # fixme: at least we should retry not ignoring rpc
-                    logging.warning(f"Ignore rpc {rpc_url} because of {e}")
-                if len(multi_calls) != 0 and len(contracts) != 0:
-                    is_rpc_provided = True
-
-                self.multi_calls[wb3_k] = multi_calls
-                self.contracts[wb3_k] = contracts
+        for (wb3_k, _), multi_calls in zip(brackets, bracket_multi_calls):  # type: Tuple, List[AsyncMulticall]
+            multi_calls = [mc for mc in multi_calls if mc is not None]
+            if len(multi_calls) != 0:
+                is_rpc_provided = True
+
+            self.multi_calls[wb3_k] = multi_calls
 
         if not is_rpc_provided:
             raise ValueError("No available rpc provided")
 
+        self._brackets = {'transaction': [], 'view': []}
+        self._rpc_labels = {
+            id(p): (p.provider.endpoint_uri, get_span_proper_label_from_provider(p.provider.endpoint_uri))
+            for _, wb3_v in self.providers.items() for p in wb3_v
+        }
+        for wb3_k, wb3_v in self.providers.items():  # type: Tuple, List[web3.AsyncWeb3]
+            self._brackets[wb3_k[0]].append(RpcBracket(
+                providers=wb3_v,
+                unique_providers=unique_by_endpoint(wb3_v),
+                multi_calls=self.multi_calls.get(wb3_k, []),
+                rpc_urls=[p.provider.endpoint_uri for p in wb3_v],
+            ))
+
+        fn_abis = [abi for abi in self.contract_abi if abi.get('type') == 'function']
+        fn_names = [abi['name'] for abi in fn_abis]
+        # overloaded functions are resolved by their arguments in each call
+        self._fn_abis = {abi['name']: abi for abi in fn_abis if fn_names.count(abi['name']) == 1}
+
+    async def close(self) -> None:
+        """
+        Close the shared http session of providers and the gas estimation.
+        """
+        if self._session is not None:
+            await self._session.close()
+        if self.gas_estimation is not None:
+            await self.gas_estimation.close()
+
     @staticmethod
-    async def __gather_tasks(execution_list: List[Coroutine], result_selector: Callable[[List], any],
-                             view_policy: ViewPolicy = ViewPolicy.MostUpdated):
+    async def __gather_tasks(execution_list: List[Coroutine], result_selector: Callable[[List], Any],
+                             view_policy: ViewPolicy = ViewPolicy.MostUpdated) -> Any:
         """
         Get an execution list and wait for all to end. If all executable raise an exception, it will raise a
         'Web3InterfaceException' exception, otherwise returns all results which has no exception
@@ -145,28 +211,16 @@ class BaseMultiRpc(ABC):
 
         """
 
-        def wrap_coroutine(coro: Coroutine):
-            def sync_wrapper():
-                try:
-                    res = asyncio.run(coro)
-                    return res, None
-                except Exception as e:
-                    return None, e
-
-            return sync_wrapper
-
         mrpc_cntr.incr_cur_func()
 
         if view_policy == view_policy.MostUpdated:  # wait for all task to be completed
             results = []
             exceptions = []
-            with ThreadPoolExecutor() as executor:
-                wrapped_coroutines = [wrap_coroutine(coro) for coro in execution_list]
-                for result, exception in executor.map(lambda f: f(), wrapped_coroutines):
-                    if exception:
-                        exceptions.append(exception)
-                    else:
-                        results.append(result)
+            for result in await asyncio.gather(*execution_list, return_exceptions=True):
+                if isinstance(result, BaseException):
+                    exceptions.append(result)
+                else:
+                    results.append(result)
 
             if len(results) == 0:
                 for exc in exceptions:
@@ -182,10 +236,37 @@ class BaseMultiRpc(ABC):
 
         raise NotValidViewPolicy()
 
+    async def _call_view_functions(self,
+                                   func_calls: List[Tuple[str, Tuple, Dict]],
+                                   block_identifier: Union[str, int] = 'latest') -> List:
+        """
+        Calling several view functions by using of one multicall for each rpc
+
+        Args:
+            func_calls: list of (function name, args, kwargs)
+            block_identifier:
+
+        Returns:
+            the results of view functions in the same order of func_calls
+        """
+
+        def max_block_finder(results: List):
+            return max(results, key=_block_number_of)[2]
+
+        mrpc_cntr.incr_cur_func()
+        calls = [AsyncCall(self.contract, func_name, args, kwargs) for func_name, args, kwargs in func_calls]
+        for bracket in self._brackets['view']:
+            execution_list = [mc.call(calls, block_identifier=block_identifier) for mc in bracket.multi_calls]
+            try:
+                return await self.__gather_tasks(execution_list, max_block_finder, view_policy=self.view_policy)
+            except (Web3InterfaceException, asyncio.TimeoutError):
+                logging.info(f"Can't call view function from this list of rpc({bracket.rpc_urls})")
+        raise Web3InterfaceException("All of RPCs raise exception.")
+
     async def _call_view_function(self,
                                   func_name: str,
                                   block_identifier: Union[str, int] = 'latest',
-                                  *args, **kwargs):
+                                  *args, **kwargs) -> Any:
         """
         Calling view function 'func_name' by using of multicall
 
@@ -195,39 +276,41 @@ class BaseMultiRpc(ABC):
             **kwargs:
 
         Returns:
-            the results of multicallable object for each rpc
+            the result of view function
         """
+        mrpc_cntr.incr_cur_func()
+        return (await self._call_view_functions([(func_name, args, kwargs)], block_identifier))[0]
 
-        def max_block_finder(results: List):
-            max_block_number = results[0][0]
-            max_index = 0
-            for i, result in enumerate(results):
-                if result[0] > max_block_number:
-                    max_block_number = result[0]
-                    max_index = i
-            return results[max_index][2][0]
+    async def call_many(self, funcs: List['BaseBoundContractFunction'],
+                        block_identifier: Union[str, int] = 'latest') -> List:
+        """
+        Calling several view functions with one multicall request for each rpc
 
-        mrpc_cntr.incr_cur_func()
-        for contracts, multi_calls in zip(self.contracts['view'].values(),
-                                          self.multi_calls['view'].values()):  # type: any, List[AsyncMulticall]
-            rpc_bracket = list(map(lambda c: c.w3.provider.endpoint_uri, contracts))
+        Args:
+            funcs: view functions with their arguments, e.g. [mr.functions.map(addr1), mr.functions.map(addr2)]
+            block_identifier:
 
-            calls = [AsyncCall(cont, func_name, args, kwargs) for cont in contracts]
-            execution_list = [mc.call([call], block_identifier=block_identifier) for mc, call in
-                              zip(multi_calls, calls)]
-            try:
-                return await self.__gather_tasks(execution_list, max_block_finder, view_policy=self.view_policy)
-            except (Web3InterfaceException, asyncio.TimeoutError):
-                logging.info(f"Can't call view function from this list of rpc({rpc_bracket})")
-        raise Web3InterfaceException("All of RPCs raise exception.")
+        Returns:
+            the results of view functions in the same order of funcs
+        """
+        mrpc_cntr.incr_cur_func()
+        self.check_for_view()
+        for func in funcs:
+            if not isinstance(func, BaseBoundContractFunction):
+                raise TypeError(f"{func.name} has no arguments, call it first, e.g. mr.functions.{func.name}()")
+            if func.typ != ContractFunctionType.View:
+                raise ValueError(f"{func.name} is not a view function")
+        return await self._call_view_functions(
+            [(func.name, func.args, func.kwargs) for func in funcs], block_identifier
+        )
 
     async def _get_nonce(self, address: Union[Address, ChecksumAddress, str]) -> int:
         mrpc_cntr.incr_cur_func()
-        address = Web3.to_checksum_address(address)
-        providers_4_nonce = self.providers.get('view') or self.providers['transaction']
-        for providers in providers_4_nonce.values():
+        address = to_checksum_address(address)
+        brackets_4_nonce = self._brackets['view'] or self._brackets['transaction']
+        for bracket in brackets_4_nonce:
             execution_list = [
-                prov.eth.get_transaction_count(address) for prov in providers
+                prov.eth.get_transaction_count(address) for prov in bracket.unique_providers
             ]
             try:
                 return await self.__gather_tasks(execution_list, max)
@@ -237,9 +320,13 @@ class BaseMultiRpc(ABC):
         raise Web3InterfaceException("All of RPCs raise exception.")
 
     async def _get_tx_params(
-            self, nonce: int, address: str, gas_limit: int, gas_upper_bound: int, priority:
-            TxPriority, gas_estimation_method: GasEstimationMethod) -> Dict:
-        gas_params = await self.gas_estimation.get_gas_price(gas_upper_bound, priority, gas_estimation_method)
+            self, address: str, gas_limit: int, gas_upper_bound: int, priority: TxPriority,
+            gas_estimation_method: GasEstimationMethod) -> Dict:
+        # nonce and gas price don't depend on each other, so their round trips overlap
+        nonce, gas_params = await asyncio.gather(
+            self._get_nonce(address),
+            self.gas_estimation.get_gas_price(gas_upper_bound, priority, gas_estimation_method),
+        )
         tx_params = {
             "from": address,
             "nonce": nonce,
@@ -249,23 +336,32 @@ class BaseMultiRpc(ABC):
         tx_params.update(gas_params)
         return tx_params
 
-    @staticmethod
-    async def _build_transaction(contract: Contract, func_name: str, func_args: Tuple,
-                                 func_kwargs: Dict, tx_params: Dict):
-        func_args = func_args or []
-        func_kwargs = func_kwargs or {}
-        return await contract.functions.__getattribute__(func_name)(*func_args, **func_kwargs
-                                                                    ).build_transaction(tx_params)
+    def _encode_calldata(self, w3: AsyncWeb3, func_name: str, func_args: Tuple, func_kwargs: Dict) -> HexStr:
+        return encode_transaction_data(
+            w3, func_name, self.contract_abi, self._fn_abis.get(func_name), func_args or [], func_kwargs or {}
+        )
+
+    def _build_transaction(self, func_name: str, func_args: Tuple, func_kwargs: Dict, tx_params: Dict) -> Dict:
+        """
+        tx_params already has all the fields(nonce, gas, gas price, chainId), so the transaction is built locally
+        without any rpc call
+        """
+        return {
+            **tx_params,
+            'to': self.contract_address,
+            'data': self._encode_calldata(self.contract.w3, func_name, func_args, func_kwargs),
+            'value': 0,
+        }
 
     async def _build_and_sign_transaction(
-            self, contract: Contract, provider: AsyncWeb3, func_name: str, func_args: Tuple,
+            self, provider: AsyncWeb3, func_name: str, func_args: Tuple,
             func_kwargs: Dict, signer_private_key: str, tx_params: Dict,
             enable_gas_estimation: bool) -> SignedTransaction:
         mrpc_cntr.incr_cur_func()
         try:
             mrpc_cntr('_build_and_sign_transaction end')
-            tx = await self._build_transaction(contract, func_name, func_args, func_kwargs, tx_params)
-            account: LocalAccount = Account.from_key(signer_private_key)
+            tx = self._build_transaction(func_name, func_args, func_kwargs, tx_params)
+            account = _account_from_key(signer_private_key)
             if enable_gas_estimation:
                 estimate_gas = await provider.eth.estimate_gas(tx)
                 logging.info(f"gas_estimation({estimate_gas} gas needed) is successful")
@@ -275,20 +371,21 @@ class BaseMultiRpc(ABC):
             mrpc_cntr(f'unknown ex {e.__class__.__name__}')
             raise
 
-    async def _send_transaction(self, provider: web3.AsyncWeb3, raw_transaction: any) -> Tuple[AsyncWeb3, any]:
+    async def _send_transaction(self, provider: web3.AsyncWeb3, raw_transaction: Any) -> Tuple[AsyncWeb3, Any]:
         mrpc_cntr.incr_cur_func()
-        rpc_url = provider.provider.endpoint_uri
+        rpc_url, rpc_label_prefix = self._rpc_labels[id(provider)]
         try:
-            rpc_label_prefix = get_span_proper_label_from_provider(rpc_url)
             transaction = await provider.eth.send_raw_transaction(raw_transaction)
             self._logger_params(**{f"{rpc_label_prefix}_post_send_time": get_unix_time()})
-            self._logger_params(tx_send_time=int(time.time() * 1000))
+            self._logger_params(tx_send_time=get_unix_time())
             mrpc_cntr('_send_transaction end')
             return provider, transaction
         except ValueError as e:
             logging.error(f"RPC({rpc_url}) value error: {str(e)}")
             mrpc_cntr(f'ValueError {str(e)[:30]}')
-            t_bnb_flag = "transaction would cause overdraft" in str(e).lower() and (await provider.eth.chain_id) == 97
+            if 'transaction underpriced' in str(e).lower():
+                self.gas_estimation.clear_cache()
+            t_bnb_flag = "transaction would cause overdraft" in str(e).lower() and self.chain_id == 97
             if not (
                     t_bnb_flag or
                     'nonce too low' in str(e).lower() or
@@ -335,7 +432,7 @@ class BaseMultiRpc(ABC):
                                        func_args: Tuple, func_kwargs: Dict) -> Tuple[AsyncWeb3, TxReceipt]:
         mrpc_cntr.incr_cur_func()
         con_err_count = tx_err_count = 0
-        rpc_url = provider.provider.endpoint_uri
+        rpc_url = self._rpc_labels[id(provider)][0]
         while True:
             try:
                 self._logger_params(received_provider=rpc_url)
@@ -348,7 +445,7 @@ class BaseMultiRpc(ABC):
                 if con_err_count >= 5:
                     raise
                 con_err_count += 1
-                sleep(5)
+                await asyncio.sleep(min(30, 2 ** con_err_count))
             except (TimeExhausted, TransactionNotFound):
                 if tx_err_count >= 1:  # double-check the endpoint_uri
                     raise
@@ -361,55 +458,29 @@ class BaseMultiRpc(ABC):
             exception_handler: Optional[List[type[BaseException]]] = None,
             final_exception: Optional[type[BaseException]] = None
     ) -> T:
-
-        async def exec_task(task: Coroutine, cancel_event: ResultEvent, lock: asyncio.Lock):
-            res = await task
-            async with lock:
-                cancel_event.set_result(res)
-            cancel_event.set()
-
         mrpc_cntr.incr_cur_func()
 
-        cancel_event = ResultEvent()
-        lock = asyncio.Lock()
-
-        tasks = [
-            asyncio.create_task(exec_task(task, cancel_event, lock))
-            for task in execution_list
-        ]
-        not_completed_tasks = tasks.copy()
+        handled_exceptions = tuple(exception_handler or ())
+        tasks = [asyncio.ensure_future(task) for task in execution_list]
         exception = None
-        terminal_exception = None
-
-        while len(not_completed_tasks) > 0:
-            dones, not_completed_tasks = await asyncio.wait(
-                not_completed_tasks, return_when=asyncio.FIRST_COMPLETED
-            )
-
-            for task in list(dones):
-                e = task.exception()
-                if e:
-                    if exception_handler and isinstance(e, tuple(exception_handler)):
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                try:
+                    return await next_done
+                except Exception as e:
+                    if isinstance(e, handled_exceptions):
                         exception = e
-                    else:
-                        terminal_exception = e
-                    continue
-                if cancel_event.is_set():
-                    break
-
-            if cancel_event.is_set() or terminal_exception:
-                break
-
-        # Cancel the remaining tasks
-        for task in not_completed_tasks:
-            if not task.done():
-                task.cancel()
-        await asyncio.gather(*tasks, return_exceptions=True)
-
-        if cancel_event.is_set():
-            return cancel_event.get_result()
-        if terminal_exception or exception:
-            raise terminal_exception or exception
+                        continue
+                    raise
+        finally:
+            # Cancel the remaining tasks
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+        if exception:
+            raise exception
         raise final_exception or RuntimeError("Execution completed without setting a result or exception.")
 
     async def __call_tx(
@@ -420,13 +491,12 @@ class BaseMultiRpc(ABC):
             private_key: str,
             wait_for_receipt: int,
             providers: List[AsyncWeb3],
-            contracts: List[Contract],
             tx_params: Dict,
             enable_gas_estimation: bool,
     ) -> Union[str, TxReceipt]:
         mrpc_cntr.incr_cur_func()
         signed_transaction = await self._build_and_sign_transaction(
-            contracts[0], providers[0], func_name, func_args, func_kwargs, private_key, tx_params, enable_gas_estimation
+            providers[0], func_name, func_args, func_kwargs, private_key, tx_params, enable_gas_estimation
         )
         tx_hash = Web3.to_hex(signed_transaction.hash)
         self._logger_params(tx_hash=tx_hash)
@@ -442,7 +512,7 @@ class BaseMultiRpc(ABC):
         provider, tx = result
 
         logging.info(f"success tx: {provider= }, {tx= }")
-        rpc_url = provider.provider.endpoint_uri
+        rpc_url = self._rpc_labels[id(provider)][0]
         self._logger_params(sent_provider=rpc_url)
 
         if not wait_for_receipt:
@@ -459,18 +529,13 @@ class BaseMultiRpc(ABC):
 
     async def _call_tx_function(self, address: str, gas_limit: int, gas_upper_bound: int, priority: TxPriority,
                                 gas_estimation_method: GasEstimationMethod,
-                                enable_gas_estimation: Optional[bool] = None, **kwargs):
+                                enable_gas_estimation: Optional[bool] = None, **kwargs) -> Union[str, TxReceipt]:
         mrpc_cntr.incr_cur_func()
-        nonce = await self._get_nonce(address)
-        tx_params = await self._get_tx_params(
-            nonce, address, gas_limit, gas_upper_bound, priority, gas_estimation_method
-        )
+        tx_params = await self._get_tx_params(address, gas_limit, gas_upper_bound, priority, gas_estimation_method)
         enable_gas_estimation = self.enable_gas_estimation if enable_gas_estimation is None else enable_gas_estimation
-        for p, c in zip(
-                self.providers['transaction'].values(), self.contracts['transaction'].values()
-        ):  # type: List[AsyncWeb3], List[Contract]
+        for bracket in self._brackets['transaction']:
             try:
-                return await self.__call_tx(**kwargs, providers=p, contracts=c, tx_params=tx_params,
+                return await self.__call_tx(**kwargs, providers=bracket.providers, tx_params=tx_params,
                                             enable_gas_estimation=enable_gas_estimation)
             except (TransactionFailedStatus, TransactionValueError):
                 raise
@@ -480,7 +545,7 @@ class BaseMultiRpc(ABC):
                 raise
         raise Web3InterfaceException("All of RPCs raise exception.")
 
-    def check_for_view(self):
+    def check_for_view(self) -> None:
         if self.providers.get('view') is None:
             raise DontHaveThisRpcType(f"Doesn't have view RPCs")
 
@@ -492,8 +557,8 @@ class BaseMultiRpc(ABC):
         exceptions = (HTTPError, ConnectionError, ReadTimeout, ValueError, TimeExhausted, TransactionNotFound)
 
         last_exception = None
-        for provider in self.providers['view'].values():  # type: List[AsyncWeb3]
-            execution_tx_list = [p.eth.wait_for_transaction_receipt(tx_hash) for p in provider]
+        for bracket in self._brackets['view']:
+            execution_tx_list = [p.eth.wait_for_transaction_receipt(tx_hash) for p in bracket.unique_providers]
             try:
                 return await self.__execute_batch_tasks(
                     execution_tx_list,
@@ -513,8 +578,8 @@ class BaseMultiRpc(ABC):
 
         exceptions = (HTTPError, ConnectionError, ReadTimeout, ValueError, TimeExhausted, BlockNotFound)
         last_exception = None
-        for provider in self.providers['view'].values():  # type: List[AsyncWeb3]
-            execution_tx_params_list = [p.eth.get_block(block_identifier, full_transactions) for p in provider]
+        for bracket in self._brackets['view']:
+            execution_tx_params_list = [p.eth.get_block(block_identifier, full_transactions) for p in bracket.providers]
             try:
                 return await self.__execute_batch_tasks(
                     execution_tx_params_list,
@@ -534,15 +599,14 @@ class BaseMultiRpc(ABC):
 
         exceptions = (HTTPError, ConnectionError, ReadTimeout, ValueError, TimeExhausted)
         last_exception = None
-        for provider in self.providers['view'].values():  # type: List[AsyncWeb3]
-            execution_tx_params_list = [asyncio.to_thread(p.eth.get_block_number) for p in provider]
+        for bracket in self._brackets['view']:
+            execution_tx_params_list = [p.eth.get_block_number() for p in bracket.unique_providers]
             try:
-                result = await self.__execute_batch_tasks(
+                return await self.__execute_batch_tasks(
                     execution_tx_params_list,
                     list(exceptions),
                     GetBlockFailed
                 )
-                return await result
             except exceptions as e:
                 last_exception = e
                 pass
@@ -552,20 +616,40 @@ class BaseMultiRpc(ABC):
 
 
 class BaseContractFunction:
+    __slots__ = ('name', 'mr', 'typ', 'abi')
+
     def __init__(self, name: str, abi: Dict, multi_rpc_web3: BaseMultiRpc, typ: str):
-        self.name = name
-        self.mr = multi_rpc_web3
-        self.typ = typ
-        self.abi = abi
-        self.args = None
-        self.kwargs = None
-
-    def get_encoded_data(self):
+        self.name: str = name
+        self.mr: BaseMultiRpc = multi_rpc_web3
+        self.typ: str = typ
+        self.abi: Dict = abi
+
+
+class BaseBoundContractFunction:
+    """
+    A contract function with its arguments. It is returned by calling a contract function, e.g. mr.functions.map(addr)
+    """
+    __slots__ = ('function', 'args', 'kwargs')
+
+    def __init__(self, function: BaseContractFunction, args: Tuple, kwargs: Dict):
+        self.function: BaseContractFunction = function
+        self.args: Tuple = args
+        self.kwargs: Dict = kwargs
+
+    @property
+    def name(self) -> str:
+        return self.function.name
+
+    @property
+    def typ(self) -> str:
+        return self.function.typ
+
+    def get_encoded_data(self) -> HexStr:
         return encode_transaction_data(
-            self.mr.providers[0],
-            self.name,
-            self.mr.contract_abi,
-            self.abi,
+            self.function.mr.contract.w3,
+            self.function.name,
+            self.function.mr.contract_abi,
+            self.function.abi,
             self.args,
             self.kwargs,
         )
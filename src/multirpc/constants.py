@@ -28,4 +28,9 @@ class GasEstimationMethod(enum.Enum):
 
 MaxRPCInEachBracket = 3
 RequestTimeout = 30
+GasPriceCacheTTL = 2  # seconds
+GasPriceRequestTimeout = 2  # seconds
+GasApiCacheTTL = 5  # seconds
+GasApiHourBoundaryThreshold = 60  # seconds
+MulticallSetupTimeout = 10  # seconds
 DevEnv = True
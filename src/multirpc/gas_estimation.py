@@ -1,19 +1,20 @@
+import asyncio
 import logging
-from _decimal import Decimal
+import time
 from decimal import Decimal
-from typing import Callable, Union
-from typing import List, Dict, Optional
+from functools import partial
+from typing import Callable, Union, Awaitable, Any
+from typing import List, Dict, Optional, Tuple
 
-import requests
-from aiohttp import ClientResponseError
-from requests import JSONDecodeError, RequestException, ReadTimeout, ConnectionError
+from aiohttp import ClientResponseError, ClientError, ClientTimeout
+from requests import ReadTimeout, ConnectionError
 from web3 import Web3, AsyncWeb3
 from web3.types import Wei
 
 from .constants import ChainIdToGas, FixedValueGas, DEFAULT_API_PROVIDER, GasEstimationMethod, RequestTimeout, DevEnv, \
-    GasFromRpcChainIds
+    GasFromRpcChainIds, GasPriceCacheTTL, GasApiCacheTTL, GasPriceRequestTimeout, GasApiHourBoundaryThreshold
 from .exceptions import OutOfRangeTransactionFee, FailedToGetGasPrice
-from .utils import TxPriority
+from .utils import TxPriority, SharedClientSession
 
 
 class GasEstimation:
@@ -27,7 +28,9 @@ class GasEstimation:
             gas_multiplier_low: Union[float, Decimal] = 1,
             gas_multiplier_medium: Union[float, Decimal] = 1,
             gas_multiplier_high: Union[float, Decimal] = 1,
-            gas_api_provider: str = DEFAULT_API_PROVIDER
+            gas_api_provider: str = DEFAULT_API_PROVIDER,
+            gas_api_updates_hourly: bool = False,
+            http_session: Optional[SharedClientSession] = None,
     ):
         """
 
@@ -40,8 +43,13 @@ class GasEstimation:
             gas_multiplier_medium:
             gas_multiplier_high:
             gas_api_provider:
+            gas_api_updates_hourly: cache api results until the end of the current hour
+            http_session: connection pool for the gas api, e.g. the one shared by the MultiRpc providers
         """
         self.gas_api_provider = gas_api_provider
+        self._gas_api_url = gas_api_provider.format(chain_id=chain_id)
+        self.gas_api_updates_hourly = gas_api_updates_hourly
+        self._force_rpc = chain_id in GasFromRpcChainIds
         self.chain_id = chain_id
         self.providers = providers
         self.default_method: GasEstimationMethod = default_method
@@ -57,12 +65,15 @@ class GasEstimation:
             GasEstimationMethod.FIXED: self._get_fixed_value,
             GasEstimationMethod.CUSTOM: self._custom_gas_estimation,
         }
+        self._default_estimator: Optional[Callable] = self.gas_estimation_method.get(default_method)
         self.method_sorted_priority = [
             GasEstimationMethod.GAS_API_PROVIDER,
             GasEstimationMethod.RPC,
             GasEstimationMethod.FIXED,
             GasEstimationMethod.CUSTOM
         ]
+        self._http = http_session or SharedClientSession(limit=32, keepalive_timeout=60)
+        self._cache: Dict[Tuple, Tuple[float, Any]] = {}  # (method, [priority]) -> (expires at, raw price)
 
     def __logger_params(self, **kwargs):
         if self.apm:
@@ -70,58 +81,104 @@ class GasEstimation:
         else:
             logging.info(f'params={kwargs}')
 
-    async def _get_gas_from_api(self, priority: TxPriority, gas_upper_bound: Union[float, Decimal]) -> Dict[str, Wei]:
-        gas_provider = self.gas_api_provider.format(chain_id=self.chain_id)
+    async def _fetch_gas_from_api(self, priority: TxPriority) -> Tuple[float, float]:
         resp = None
         try:
-            resp = requests.get(gas_provider, timeout=RequestTimeout)
-            resp_json = resp.json()
-            max_fee_per_gas = Decimal(resp_json[priority.value]["suggestedMaxFeePerGas"])
-            max_priority_fee_per_gas = Decimal(resp_json[priority.value]["suggestedMaxPriorityFeePerGas"])
-            self.__logger_params(
-                max_fee_per_gas=max_fee_per_gas,
-                max_priority_fee_per_gas=max_priority_fee_per_gas,
-                gas_price_provider=gas_provider,
+            session = await self._http.get_session()
+            async with session.get(self._gas_api_url, timeout=ClientTimeout(total=RequestTimeout)) as resp:
+                resp_json = await resp.json(content_type=None)
+            return (
+                float(resp_json[priority.value]["suggestedMaxFeePerGas"]),
+                float(resp_json[priority.value]["suggestedMaxPriorityFeePerGas"]),
             )
-            if max_fee_per_gas > gas_upper_bound:
-                raise OutOfRangeTransactionFee(
-                    f"gas price exceeded. {gas_upper_bound=} but it is {max_fee_per_gas}"
-                )
-            gas_params = {
-                "maxFeePerGas": Web3.to_wei(max_fee_per_gas, "GWei"),
-                "maxPriorityFeePerGas": Web3.to_wei(max_priority_fee_per_gas, "GWei"),
-            }
-            return gas_params
-        except (RequestException, JSONDecodeError, KeyError) as e:
+        except (ClientError, asyncio.TimeoutError, ValueError, KeyError) as e:
             if not DevEnv:
-                logging.exception(f'Failed to get gas info from metaswap {resp.status_code=}')
+                # with raise_for_status the error carries the status, `resp` is never assigned
+                status = e.status if isinstance(e, ClientResponseError) else getattr(resp, "status", None)
+                logging.exception(f'Failed to get gas info from metaswap status={status}')
             raise FailedToGetGasPrice(f"Failed to get gas info from api: {e}")
 
-    async def _get_gas_from_rpc(self, priority: TxPriority, gas_upper_bound: Union[float, Decimal]) -> Dict[str, Wei]:
+    async def _get_gas_from_api(self, priority: TxPriority, gas_upper_bound: Union[float, Decimal]) -> Dict[str, Wei]:
+        max_fee_per_gas, max_priority_fee_per_gas = await self._cached(
+            (GasEstimationMethod.GAS_API_PROVIDER, priority),
+            self._cache_ttl(GasEstimationMethod.GAS_API_PROVIDER),
+            partial(self._fetch_gas_from_api, priority),
+        )
+        self.__logger_params(
+            max_fee_per_gas=max_fee_per_gas,
+            max_priority_fee_per_gas=max_priority_fee_per_gas,
+            gas_price_provider=self._gas_api_url,
+        )
+        if max_fee_per_gas > gas_upper_bound:
+            raise OutOfRangeTransactionFee(
+                f"gas price exceeded. {gas_upper_bound=} but it is {max_fee_per_gas}"
+            )
+        gas_params = {
+            # rounded, since a float of gwei can be a fraction of a wei off
+            "maxFeePerGas": Wei(round(max_fee_per_gas * 1_000_000_000)),
+            "maxPriorityFeePerGas": Wei(round(max_priority_fee_per_gas * 1_000_000_000)),
+        }
+        return gas_params
+
+    async def _fetch_gas_from_rpc(self, gas_upper_bound: Union[float, Decimal]) -> int:
         gas_price = None
         found_gas_below_upper_bound = False
+        response_error = None
 
-        for provider in self.providers:  # type: AsyncWeb3
-            rpc_url = provider.provider.endpoint_uri
-            try:
-                gas_price = await provider.eth.gas_price
-                self.__logger_params(gas_price=str(gas_price / 1e9), gas_price_provider=rpc_url)
-                if gas_price / 1e9 <= gas_upper_bound:
-                    found_gas_below_upper_bound = True
-                    break
-            except (ConnectionError, ReadTimeout, ValueError, ConnectionResetError) as e:
-                logging.error(f"Failed to get gas price from {rpc_url}, {e=}")
-            except ClientResponseError as e:
-                if e.message.startswith("Too Many Requests"):
-                    logging.error(f"Failed to get gas price from {rpc_url}, {e=}")
-                raise
+        tasks = {
+            asyncio.create_task(asyncio.wait_for(provider.eth.gas_price, GasPriceRequestTimeout)):
+                provider.provider.endpoint_uri
+            for provider in self.providers  # type: AsyncWeb3
+        }
+        pending = set(tasks)
+        try:
+            while pending and not found_gas_below_upper_bound and response_error is None:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    rpc_url = tasks[task]
+                    try:
+                        price = task.result()
+                    except (ConnectionError, ReadTimeout, ValueError, ConnectionResetError, asyncio.TimeoutError) as e:
+                        logging.error(f"Failed to get gas price from {rpc_url}, {e=}")
+                        continue
+                    except ClientResponseError as e:
+                        if e.message.startswith("Too Many Requests"):
+                            logging.error(f"Failed to get gas price from {rpc_url}, {e=}")
+                        # raised once the other tasks are done, so none of them is left unread or unawaited
+                        response_error = e
+                        continue
+                    self.__logger_params(gas_price=str(price / 1e9), gas_price_provider=rpc_url)
+                    if found_gas_below_upper_bound:
+                        continue
+                    if price / 1e9 <= gas_upper_bound:
+                        gas_price = price
+                        found_gas_below_upper_bound = True
+                    else:
+                        gas_price = price if gas_price is None else min(gas_price, price)
+        finally:
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
 
+        if response_error is not None:
+            raise response_error
         if gas_price is None:
             raise FailedToGetGasPrice("Non of RCP could provide gas price!")
         if not found_gas_below_upper_bound:
             raise OutOfRangeTransactionFee(
                 f"gas price exceeded. {gas_upper_bound=} but it is {gas_price / 1e9}"
             )
+        return gas_price
+
+    async def _get_gas_from_rpc(self, priority: TxPriority, gas_upper_bound: Union[float, Decimal]) -> Dict[str, Wei]:
+        # the rpc price doesn't depend on the priority, so all priorities share one cache entry
+        gas_price = await self._cached(
+            (GasEstimationMethod.RPC,),
+            self._cache_ttl(GasEstimationMethod.RPC),
+            partial(self._fetch_gas_from_rpc, gas_upper_bound),
+        )
+        if gas_price / 1e9 > gas_upper_bound:
+            raise OutOfRangeTransactionFee(f"gas price exceeded. {gas_upper_bound=} but it is {gas_price / 1e9}")
         return {'gasPrice': Wei(gas_price * self.multipliers.get(priority, 1))}
 
     async def _get_fixed_value(self, priority: TxPriority, gas_upper_bound: Union[float, Decimal]) -> Dict[str, Wei]:
@@ -133,17 +190,51 @@ class GasEstimation:
     async def _custom_gas_estimation(self, priority: TxPriority, gas_upper_bound: Union[float, Decimal]):
         raise NotImplemented()
 
+    def _cache_ttl(self, method: GasEstimationMethod) -> float:
+        if method == GasEstimationMethod.RPC:
+            return GasPriceCacheTTL
+        if method == GasEstimationMethod.GAS_API_PROVIDER:
+            if not self.gas_api_updates_hourly:
+                return GasApiCacheTTL
+            ttl = (3600 - int(time.time()) % 3600) + 2
+            # right after the hour the provider may not have published new values yet
+            return 0 if ttl > 3600 - GasApiHourBoundaryThreshold else ttl
+        return 0
+
+    async def close(self) -> None:
+        """
+        Close the http session used for the gas api.
+        """
+        await self._http.close()
+
+    def clear_cache(self):
+        self._cache.clear()
+
+    async def _cached(self, key: Tuple, ttl: float, fetch: Callable[[], Awaitable]) -> Any:
+        """
+        Return the cached result of `fetch` for `key`, or fetch and cache it for `ttl` seconds. Only raw prices are
+        cached, so the upper bound and the priority multiplier are applied on every call.
+        """
+        entry = self._cache.get(key)
+        if entry and entry[0] > time.monotonic():
+            return entry[1]
+        value = await fetch()
+        if ttl:
+            self._cache[key] = (time.monotonic() + ttl, value)
+        return value
+
     async def get_gas_price(
             self, gas_upper_bound: float, priority: TxPriority, method: GasEstimationMethod = None
     ) -> Dict[str, Wei]:
-        if method := self.gas_estimation_method.get(method) or self.gas_estimation_method.get(self.default_method):
-            try:
-                return await method(priority, gas_upper_bound)
-            except FailedToGetGasPrice as e:
-                raise e
+        # rpc is the source of truth for these chains, unless the caller asks for another method
+        if self._force_rpc and method is None:
+            return await self._get_gas_from_rpc(priority, gas_upper_bound)
+        estimator = self.gas_estimation_method.get(method, self._default_estimator)
+        if estimator is not None:
+            return await estimator(priority, gas_upper_bound)
         gas_params = {}
 
-        if DevEnv or self.chain_id in GasFromRpcChainIds:
+        if DevEnv:
             return await self._get_gas_from_rpc(priority, gas_upper_bound)
         for method_key in self.method_sorted_priority:
             try:
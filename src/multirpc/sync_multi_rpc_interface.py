@@ -1,17 +1,36 @@
 import asyncio
 import logging
-from typing import Union, Dict, Optional
+import weakref
+from threading import Thread, current_thread
+from typing import Union, Dict, Optional, List, Coroutine, Any
 
 from eth_typing import Address, ChecksumAddress
 from web3._utils.contracts import encode_transaction_data  # noqa
 from web3.types import BlockData, BlockIdentifier, TxReceipt
 
 from . import BaseMultiRpc
-from .base_multi_rpc_interface import BaseContractFunction
+from .base_multi_rpc_interface import BaseContractFunction, BaseBoundContractFunction
 from .constants import ViewPolicy
 from .exceptions import DontHaveThisRpcType
 from .gas_estimation import GasEstimation, GasEstimationMethod
-from .utils import TxPriority, NestedDict, ContractFunctionType, thread_safe
+from .utils import TxPriority, NestedDict, ContractFunctionType
+
+
+def _shutdown(loop: asyncio.AbstractEventLoop, loop_thread: Thread, *closables) -> None:
+    """
+    Close `closables` (sessions, gas estimation) on the loop of a MultiRpc, then stop its thread and close the loop.
+    """
+    if current_thread() is loop_thread:  # e.g. garbage collected inside a task, waiting here would deadlock
+        loop.call_soon_threadsafe(loop.stop)
+        return
+    try:
+        for closable in closables:
+            if closable is not None:
+                asyncio.run_coroutine_threadsafe(closable.close(), loop).result()
+    finally:
+        loop.call_soon_threadsafe(loop.stop)
+        loop_thread.join()
+        loop.close()
 
 
 class MultiRpc(BaseMultiRpc):
@@ -19,7 +38,6 @@ class MultiRpc(BaseMultiRpc):
     This class is used to be more sure when running web3 view calls and sending transactions by using of multiple RPCs.
     """
 
-    @thread_safe
     def __init__(
             self,
             rpc_urls: NestedDict,
@@ -33,48 +51,63 @@ class MultiRpc(BaseMultiRpc):
             enable_gas_estimation: bool = False,
             is_proof_authority: bool = False,
             multicall_custom_address: str = None,
-            log_level: logging = logging.WARN
+            log_level: logging = logging.WARN,
+            pool_size: Optional[int] = None,
     ):
         super().__init__(rpc_urls, contract_address, contract_abi, view_policy, gas_estimation, gas_limit,
-                         gas_upper_bound, apm, enable_gas_estimation, is_proof_authority, log_level)
-
-        for func_abi in self.contract_abi:
-            if func_abi.get("stateMutability") in ("view", "pure"):
-                function_type = ContractFunctionType.View
-            elif func_abi.get("type") == "function":
-                function_type = ContractFunctionType.Transaction
-            else:
-                continue
-            self.functions.__setattr__(
-                func_abi["name"],
-                self.ContractFunction(func_abi["name"], func_abi, self, function_type),
-            )
-        asyncio.run(self.setup(multicall_custom_address=multicall_custom_address))
-
-    @thread_safe
+                         gas_upper_bound, apm, enable_gas_estimation, is_proof_authority, log_level, pool_size)
+        self._register_functions(self.ContractFunction)
+
+        # one loop for the lifetime of the object, so sessions and providers are reused between calls
+        self._loop = asyncio.new_event_loop()
+        self._loop_thread = Thread(target=self._loop.run_forever, name='multirpc-loop', daemon=True)
+        self._loop_thread.start()
+        try:
+            self._run(self.setup(multicall_custom_address=multicall_custom_address))
+        except BaseException:
+            _shutdown(self._loop, self._loop_thread, self._session, self.gas_estimation)
+            raise
+        # without a reference to self, so it also runs when the object is garbage collected without close()
+        self._finalizer = weakref.finalize(
+            self, _shutdown, self._loop, self._loop_thread, self._session, self.gas_estimation
+        )
+
+    def _run(self, coro: Coroutine) -> Any:
+        """
+        Run the coroutine on the loop of this object and wait for its result.
+        """
+        return asyncio.run_coroutine_threadsafe(coro, self._loop).result()
+
     def get_nonce(self, address: Union[Address, ChecksumAddress, str]) -> int:
-        return asyncio.run(super()._get_nonce(address))
+        return self._run(super()._get_nonce(address))
 
-    @thread_safe
     def get_tx_receipt(self, tx_hash) -> TxReceipt:
-        return asyncio.run(super().get_tx_receipt(tx_hash))
+        return self._run(super().get_tx_receipt(tx_hash))
 
-    @thread_safe
     def get_block(self, block_identifier: BlockIdentifier, full_transactions: bool = False) -> BlockData:
-        return asyncio.run(super().get_block(block_identifier, full_transactions))
+        return self._run(super().get_block(block_identifier, full_transactions))
 
-    @thread_safe
     def get_block_number(self) -> int:
-        return asyncio.run((super().get_block_number()))
+        return self._run(super().get_block_number())
+
+    def call_many(self, funcs: List[BaseBoundContractFunction], block_identifier: Union[str, int] = 'latest') -> List:
+        return self._run(super().call_many(funcs, block_identifier))
+
+    def close(self) -> None:
+        """
+        Close the sessions and stop the event loop of this object. Calling it more than once is a no-op.
+        """
+        self._finalizer()
 
     class ContractFunction(BaseContractFunction):
+        __slots__ = ()
+
         def __call__(self, *args, **kwargs):
-            cf = MultiRpc.ContractFunction(self.name, self.abi, self.mr, self.typ)
-            cf.args = args
-            cf.kwargs = kwargs
-            return cf
+            return MultiRpc.BoundContractFunction(self, args, kwargs)
+
+    class BoundContractFunction(BaseBoundContractFunction):
+        __slots__ = ()
 
-        @thread_safe
         def call(
                 self,
                 address: str = None,
@@ -87,21 +120,23 @@ class MultiRpc(BaseMultiRpc):
                 block_identifier: Union[str, int] = 'latest',
                 enable_gas_estimation: Optional[bool] = None,
         ):
-            if self.mr.providers.get(self.typ) is None:
-                raise DontHaveThisRpcType(f"Doesn't have {self.typ} RPCs")
-            if self.typ == ContractFunctionType.View:
-                return asyncio.run(self.mr._call_view_function(
-                    self.name, block_identifier, *self.args, **self.kwargs,
+            mr = self.function.mr
+            typ = self.function.typ
+            if mr.providers.get(typ) is None:
+                raise DontHaveThisRpcType(f"Doesn't have {typ} RPCs")
+            if typ == ContractFunctionType.View:
+                return mr._run(mr._call_view_function(
+                    self.function.name, block_identifier, *self.args, **self.kwargs,
                 ))
-            elif self.typ == ContractFunctionType.Transaction:
-                return asyncio.run(self.mr._call_tx_function(
-                    func_name=self.name,
+            elif typ == ContractFunctionType.Transaction:
+                return mr._run(mr._call_tx_function(
+                    func_name=self.function.name,
                     func_args=self.args,
                     func_kwargs=self.kwargs,
-                    address=address or self.mr.address,
-                    private_key=private_key or self.mr.private_key,
-                    gas_limit=gas_limit or self.mr.gas_limit,
-                    gas_upper_bound=gas_upper_bound or self.mr.gas_upper_bound,
+                    address=address or mr.address,
+                    private_key=private_key or mr.private_key,
+                    gas_limit=gas_limit or mr.gas_limit,
+                    gas_upper_bound=gas_upper_bound or mr.gas_upper_bound,
                     wait_for_receipt=wait_for_receipt,
                     priority=priority,
                     gas_estimation_method=gas_estimation_method,
@@ -3,46 +3,45 @@ import enum
 import json
 import logging
 import time
-from functools import reduce, wraps
-from threading import Thread
-from typing import Dict, List, Tuple, Union
+from concurrent.futures import ThreadPoolExecutor
+from functools import wraps, lru_cache
+from itertools import chain
+from types import MappingProxyType
+from threading import Lock
+from typing import Dict, List, Tuple, Union, Optional, Any, NamedTuple, Mapping
 
 import aiohttp.client_exceptions
 import web3
+from aiohttp import ClientSession, ClientTimeout, TCPConnector
+from eth_typing import Address, ChecksumAddress
 from web3 import Web3, AsyncWeb3
+from web3._utils.encoding import Web3JsonEncoder  # noqa
+from web3._utils.request import DEFAULT_TIMEOUT  # noqa
 from web3.middleware import async_geth_poa_middleware
+from web3.providers import AsyncHTTPProvider
+from web3.types import RPCEndpoint, RPCResponse
 
 from .constants import MaxRPCInEachBracket
 from .exceptions import MaximumRPCInEachBracketReached, AtLastProvideOneValidRPCInEachBracket
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
-def get_span_proper_label_from_provider(endpoint_uri):
-    return endpoint_uri.split("//")[-1].replace(".", "__").replace("/", "__")
-
-
-class ReturnableThread(Thread):
-    # This class is a subclass of Thread that allows the thread to return a value.
-    def __init__(self, target, args=(), kwargs=None):
-        super().__init__(target=target, args=args, kwargs=kwargs)
-        self.target = target
-        self.args = args
-        self.kwargs = kwargs
-        self.result = None
 
-    def run(self) -> None:
-        self.result = self.target(*self.args, **self.kwargs)
+@lru_cache(maxsize=1024)
+def to_checksum_address(address: Union[Address, ChecksumAddress, str]) -> ChecksumAddress:
+    return Web3.to_checksum_address(address)
 
 
-class ResultEvent(asyncio.Event):
-    def __init__(self):
-        super().__init__()
-        self.result_ = None
+@lru_cache(maxsize=256)
+def get_span_proper_label_from_provider(endpoint_uri: str) -> str:
+    return endpoint_uri.split("//")[-1].replace(".", "__").replace("/", "__")
 
-    def set_result(self, result):
-        self.result_ = result
 
-    def get_result(self):
-        return self.result_
+# long-lived worker threads for running sync calls that are made from inside a running event loop
+_thread_safe_executor = ThreadPoolExecutor(thread_name_prefix='multirpc')
 
 
 def thread_safe(func):
@@ -50,18 +49,15 @@ def thread_safe(func):
     def wrapper(*args, **kwargs):
         try:
             asyncio.get_running_loop()
-            t = ReturnableThread(target=func, args=args, kwargs=kwargs)
-            t.start()
-            t.join()
-            return t.result
         except RuntimeError:
             return func(*args, **kwargs)
+        return _thread_safe_executor.submit(func, *args, **kwargs).result()
 
     return wrapper
 
 
-def get_unix_time():
-    return int(time.time() * 1000)
+def get_unix_time() -> int:
+    return time.time_ns() // 1_000_000
 
 
 class TxPriority(enum.Enum):
@@ -75,63 +71,233 @@ class ContractFunctionType:
     Transaction = "transaction"
 
 
+class RpcBracket(NamedTuple):
+    """
+    Flattened view of one bracket of RPCs, built once in setup and used on hot paths.
+    """
+    providers: List[AsyncWeb3]
+    unique_providers: List[AsyncWeb3]
+    multi_calls: List[Any]
+    rpc_urls: List[str]
+
+
+_MISSING = object()
+
+
+def _freeze(data: Dict) -> Mapping:
+    return MappingProxyType({key: _freeze(value) if isinstance(value, dict) else value for key, value in data.items()})
+
+
 class NestedDict:
+    """
+    A dict of dicts addressed by key tuples, e.g. rpc_urls['view', 1]. Only the leaves are stored, by their full key
+    tuple; a prefix (e.g. rpc_urls['view']) and `data` are read-only views built from them.
+    """
+
     def __init__(self, data: Dict = None):
-        if data is None:
-            data = dict()
-        self.data = data
+        self._flat: Dict[Tuple, Any] = {}
+        # number of leaves under each proper prefix of a leaf key
+        self._prefixes: Dict[Tuple, int] = {}
+        # views of prefixes already looked up, dropped on every write
+        self._views: Dict[Tuple, Mapping] = {}
+        for keys, value in self._walk(data or {}):
+            self._add(keys, value)
+
+    @staticmethod
+    def _walk(data):
+        # depth first with an explicit stack of iterators, so the leaves keep their insertion order
+        stack = [((), iter(data.items()))]
+        while stack:
+            current_keys, it = stack[-1]
+            for key, value in it:
+                if isinstance(value, Mapping):
+                    stack.append((current_keys + (key,), iter(value.items())))
+                    break
+                yield current_keys + (key,), value
+            else:
+                stack.pop()
+
+    def _add(self, keys: Tuple, value) -> None:
+        self._flat[keys] = value
+        for i in range(1, len(keys)):
+            self._prefixes[keys[:i]] = self._prefixes.get(keys[:i], 0) + 1
+
+    def _remove(self, keys: Tuple) -> None:
+        del self._flat[keys]
+        for i in range(1, len(keys)):
+            if self._prefixes[keys[:i]] == 1:
+                del self._prefixes[keys[:i]]
+            else:
+                self._prefixes[keys[:i]] -= 1
+
+    def _tree(self, prefix: Tuple = ()) -> Dict:
+        tree = {}
+        for keys, value in self._flat.items():
+            if keys[:len(prefix)] == prefix:
+                current = tree
+                for key in keys[len(prefix):-1]:
+                    current = current.setdefault(key, {})
+                current[keys[-1]] = value
+        return tree
+
+    def _view(self, prefix: Tuple) -> Optional[Mapping]:
+        view = self._views.get(prefix)
+        if view is None and (not prefix or prefix in self._prefixes):
+            view = self._views[prefix] = _freeze(self._tree(prefix))
+        return view
+
+    @property
+    def data(self) -> Mapping:
+        return self._view(())
 
     def __getitem__(self, keys: Union[Tuple[any], any]):
         if not isinstance(keys, tuple):
             keys = (keys,)
-        result = self.data
-        for key in keys:
-            result = result[key]
+        result = self._flat.get(keys, _MISSING)
+        if result is _MISSING:
+            result = self._view(keys)
+            if result is None:
+                raise KeyError(keys)
         return result
 
     def __setitem__(self, keys: Union[Tuple[any], any], value) -> None:
         if not isinstance(keys, tuple):
             keys = (keys,)
-        current_dict = self.data
-        for key in keys[:-1]:
-            if not isinstance(current_dict.get(key), dict):
-                current_dict[key] = {}
-            current_dict = current_dict[key]
-        current_dict[keys[-1]] = value
+        if keys in self._flat and not isinstance(value, Mapping):
+            self._flat[keys] = value
+        else:
+            # the new value replaces the subtree under keys and any leaf on its path
+            if keys in self._flat:
+                self._remove(keys)
+            elif keys in self._prefixes:
+                for leaf in [k for k in self._flat if k[:len(keys)] == keys]:
+                    self._remove(leaf)
+            for i in range(1, len(keys)):
+                if keys[:i] in self._flat:
+                    self._remove(keys[:i])
+            if isinstance(value, Mapping):
+                for sub_keys, sub_value in self._walk(value):
+                    self._add(keys + sub_keys, sub_value)
+            else:
+                self._add(keys, value)
+        self._views.clear()
 
     def get(self, keys, default=None):
         if not isinstance(keys, tuple):
             keys = (keys,)
-        current_dict = self.data
-        for key in keys:
-            try:
-                current_dict = current_dict[key]
-            except KeyError:
+        result = self._flat.get(keys, _MISSING)
+        if result is _MISSING:
+            result = self._view(keys)
+            if result is None:
                 return default
-        return current_dict
+        return result
 
     def items(self):
-        def get_items_recursive(data, current_keys=()):
-            for key, value in data.items():
-                if isinstance(value, dict):
-                    yield from get_items_recursive(value, current_keys + (key,))
-                else:
-                    yield current_keys + (key,), value
-
-        return get_items_recursive(self.data)
+        return iter(self._flat.items())
 
     def __str__(self):
-        return str(self.data)
+        return str(self._tree())
 
     def __repr__(self):
-        return json.dumps(self.data, indent=1)
-
-
-async def create_web3_from_rpc(rpc_urls: NestedDict, is_proof_of_authority: bool) -> NestedDict:
+        return json.dumps(self._tree(), indent=1)
+
+
+class SharedClientSession:
+    """
+    Keeps one aiohttp ClientSession (with a sized connection pool) per event loop, so all providers reuse the same
+    keep-alive connections instead of opening a new TCP/TLS connection per RPC call.
+    """
+
+    def __init__(self, limit: int = 100, limit_per_host: int = 0, keepalive_timeout: float = 30,
+                 ttl_dns_cache: int = 300):
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.keepalive_timeout = keepalive_timeout
+        self.ttl_dns_cache = ttl_dns_cache
+        self._sessions: Dict[asyncio.AbstractEventLoop, ClientSession] = {}
+        self._lock = Lock()
+
+    async def get_session(self) -> ClientSession:
+        loop = asyncio.get_running_loop()
+        session = self._sessions.get(loop)
+        if session is None or session.closed:
+            # register the new session before any await, so concurrent requests of this loop reuse it
+            session = ClientSession(
+                connector=TCPConnector(
+                    limit=self.limit, limit_per_host=self.limit_per_host, keepalive_timeout=self.keepalive_timeout,
+                    ttl_dns_cache=self.ttl_dns_cache,
+                ),
+                raise_for_status=True,
+            )
+            with self._lock:
+                self._sessions[loop] = session
+            await self._close_stale_sessions()
+        return session
+
+    async def _close_stale_sessions(self) -> None:
+        # sessions of closed loops (e.g. previous `asyncio.run` calls) can't be used anymore
+        with self._lock:
+            stale = [(lp, s) for lp, s in self._sessions.items() if lp.is_closed()]
+            for lp, _ in stale:
+                del self._sessions[lp]
+        for _, session in stale:
+            if not session.closed:
+                await session.close()
+
+    async def close(self) -> None:
+        loop = asyncio.get_running_loop()
+        await self._close_stale_sessions()
+        with self._lock:
+            session = self._sessions.pop(loop, None)
+        if session is not None and not session.closed:
+            await session.close()
+
+
+class SharedSessionHTTPProvider(AsyncHTTPProvider):
+    """
+    AsyncHTTPProvider which sends requests through a `SharedClientSession` instead of web3's per-endpoint sessions.
+    """
+
+    def __init__(self, endpoint_uri: str, shared_session: SharedClientSession, request_kwargs: Optional[Any] = None):
+        super().__init__(endpoint_uri, request_kwargs)
+        self.shared_session = shared_session
+        self._json_default = Web3JsonEncoder().default
+
+    def encode_rpc_request(self, method: RPCEndpoint, params: Any) -> bytes:
+        if orjson is None:
+            return super().encode_rpc_request(method, params)
+        rpc_dict = {
+            "jsonrpc": "2.0",
+            "method": method,
+            "params": params or [],
+            "id": next(self.request_counter),
+        }
+        try:
+            return orjson.dumps(rpc_dict, default=self._json_default)
+        except orjson.JSONEncodeError:  # e.g. integers bigger than 64 bits
+            return super().encode_rpc_request(method, params)
+
+    async def make_request(self, method: RPCEndpoint, params: Any) -> RPCResponse:
+        request_data = self.encode_rpc_request(method, params)
+        kwargs = self.get_request_kwargs()
+        # same per-request timeout as web3's own AsyncHTTPProvider
+        kwargs.setdefault("timeout", ClientTimeout(DEFAULT_TIMEOUT))
+        session = await self.shared_session.get_session()
+        async with session.post(self.endpoint_uri, data=request_data, **kwargs) as response:
+            response.raise_for_status()
+            raw_response = await response.read()
+        return self.decode_rpc_response(raw_response)
+
+
+async def create_web3_from_rpc(rpc_urls: NestedDict, is_proof_of_authority: bool,
+                               shared_session: Optional[SharedClientSession] = None) -> NestedDict:
     async def create_web3(rpc: str):
         async_w3: AsyncWeb3
         if rpc.startswith("http"):
-            async_w3 = web3.AsyncWeb3(Web3.AsyncHTTPProvider(rpc))
+            if shared_session is not None:
+                async_w3 = web3.AsyncWeb3(SharedSessionHTTPProvider(rpc, shared_session))
+            else:
+                async_w3 = web3.AsyncWeb3(Web3.AsyncHTTPProvider(rpc))
         else:
             async_w3 = web3.AsyncWeb3(Web3.WebsocketProvider(rpc))
         if is_proof_of_authority:
@@ -142,15 +308,18 @@ async def create_web3_from_rpc(rpc_urls: NestedDict, is_proof_of_authority: bool
             status = False
         return async_w3, status
 
-    providers = NestedDict()
-    for key, rpcs in rpc_urls.items():
-        valid_rpcs = []
-
+    brackets = list(rpc_urls.items())
+    for _, rpcs in brackets:
         if len(rpcs) > MaxRPCInEachBracket:
             raise MaximumRPCInEachBracketReached
 
-        for i, rpc in enumerate(rpcs):
-            w3, w3_connected = await create_web3(rpc)
+    # probe every rpc of every bracket at once, so startup takes as long as the slowest probe
+    results = await asyncio.gather(*(asyncio.gather(*(create_web3(rpc) for rpc in rpcs)) for _, rpcs in brackets))
+
+    providers = NestedDict()
+    for (key, rpcs), bracket_results in zip(brackets, results):
+        valid_rpcs = []
+        for rpc, (w3, w3_connected) in zip(rpcs, bracket_results):
             if not w3_connected:
                 logging.warning(f"This rpc({rpc}) doesn't work")
                 continue
@@ -165,16 +334,44 @@ async def create_web3_from_rpc(rpc_urls: NestedDict, is_proof_of_authority: bool
 
 
 async def calculate_chain_id(providers: NestedDict) -> int:
-    last_error = None
-    for key, providers in providers.items():
-        for provider in providers:
-            try:
-                return await asyncio.wait_for(provider.eth.chain_id, timeout=2)
-            except asyncio.TimeoutError as e:
-                last_error = e
-                logging.warning(f"Can't acquire chain id from this RPC {provider.provider.endpoint_uri}")
-    raise last_error
+    all_providers = unique_by_endpoint([provider for _, bracket in providers.items() for provider in bracket])
+    # ask every rpc at once and take the first answer
+    tasks = {
+        asyncio.create_task(asyncio.wait_for(provider.eth.chain_id, timeout=2)): provider.provider.endpoint_uri
+        for provider in all_providers
+    }
+    pending = set(tasks)
+    chain_id, last_error = None, None
+    try:
+        while pending and chain_id is None:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                endpoint_uri = tasks[task]
+                try:
+                    result = task.result()
+                except Exception as e:
+                    last_error = e
+                    logging.warning(f"Can't acquire chain id from this RPC {endpoint_uri}")
+                    continue
+                chain_id = result
+    finally:
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+    if chain_id is None:
+        raise last_error
+    return chain_id
+
+
+def unique_by_endpoint(providers: List[AsyncWeb3]) -> List[AsyncWeb3]:
+    """
+    Keep only the first provider of each endpoint, so an RPC listed more than once gets a single request.
+    """
+    unique_providers = {}
+    for p in providers:
+        unique_providers.setdefault(p.provider.endpoint_uri, p)
+    return list(unique_providers.values())
 
 
 def reduce_list_of_list(ls: List[List]) -> List[any]:
-    return reduce(lambda ps, p: ps + p, ls)
+    return list(chain.from_iterable(ls))
@@ -29,7 +29,7 @@ async def async_test_map(mr: AsyncMultiRpc, addr: str = None, pk: str = None):
 
 async def async_main():
     multi_rpc = AsyncMultiRpc(RPCs, contract_addr, view_policy=ViewPolicy.FirstSuccess, contract_abi=abi,
-                              gas_estimation=None, enable_gas_estimation=True, log_level=LogLevel)
+                              gas_estimation=None, enable_gas_estimation=True, log_level=LogLevel, pool_size=8)
     multi_rpc.set_account(address1, private_key=PrivateKey1)
 
     p_block = await multi_rpc.get_block_number() - 50
@@ -43,6 +43,13 @@ async def async_main():
     await async_test_map(multi_rpc, address1)
     await async_test_map(multi_rpc, address2, PrivateKey2)
 
+    map1, map2 = await multi_rpc.call_many([multi_rpc.functions.map(address1), multi_rpc.functions.map(address2)])
+    print(f"call_many(map(addr1), map(addr2)): 0x{map1.hex()}, 0x{map2.hex()}")
+    assert map1 == await multi_rpc.functions.map(address1).call(), "call_many was not successful"
+    assert map2 == await multi_rpc.functions.map(address2).call(), "call_many was not successful"
+
+    await multi_rpc.close()
+
     print("async test was successful")
 
 
@@ -73,6 +80,13 @@ def sync_main():
     sync_test_map(multi_rpc, address1)
     sync_test_map(multi_rpc, address2, PrivateKey2)
 
+    map1, map2 = multi_rpc.call_many([multi_rpc.functions.map(address1), multi_rpc.functions.map(address2)])
+    print(f"call_many(map(addr1), map(addr2)): 0x{map1.hex()}, 0x{map2.hex()}")
+    assert map1 == multi_rpc.functions.map(address1).call(), "call_many was not successful"
+    assert map2 == multi_rpc.functions.map(address2).call(), "call_many was not successful"
+
+    multi_rpc.close()
+
     print("sync test was successful")
 
 
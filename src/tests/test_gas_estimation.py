@@ -0,0 +1,108 @@
+import time
+import unittest
+from unittest import mock
+
+from src.multirpc import BaseMultiRpc
+from src.multirpc.constants import GasEstimationMethod, GasPriceCacheTTL
+from src.multirpc.exceptions import OutOfRangeTransactionFee
+from src.multirpc.gas_estimation import GasEstimation
+from src.multirpc.utils import TxPriority, NestedDict
+
+
+class FakeEth:
+    def __init__(self, gas_price: int = None, send_error: Exception = None):
+        self._gas_price = gas_price
+        self.send_error = send_error
+        self.gas_price_calls = 0
+
+    @property
+    async def gas_price(self) -> int:
+        self.gas_price_calls += 1
+        return self._gas_price
+
+    async def send_raw_transaction(self, raw_transaction):
+        raise self.send_error
+
+
+class FakeProvider:
+    def __init__(self, endpoint_uri: str):
+        self.endpoint_uri = endpoint_uri
+
+
+class FakeWeb3:
+    def __init__(self, gas_price: int = None, send_error: Exception = None):
+        self.eth = FakeEth(gas_price, send_error)
+        self.provider = FakeProvider('http://127.0.0.1:8545')
+
+
+def gwei(value: float) -> int:
+    return int(value * 1_000_000_000)
+
+
+class TestGasEstimationCache(unittest.IsolatedAsyncioTestCase):
+
+    def make_estimation(self, gas_price: int, **kwargs) -> GasEstimation:
+        self.web3 = FakeWeb3(gas_price)
+        return GasEstimation(1, [self.web3], GasEstimationMethod.RPC, **kwargs)
+
+    async def test_cache_hit(self):
+        gas_estimation = self.make_estimation(gwei(5))
+        first = await gas_estimation.get_gas_price(10, TxPriority.Low)
+        second = await gas_estimation.get_gas_price(10, TxPriority.Low)
+        self.assertEqual(first, second)
+        self.assertEqual(self.web3.eth.gas_price_calls, 1)
+
+    async def test_cache_hit_with_multiplier(self):
+        gas_estimation = self.make_estimation(gwei(5), gas_multiplier_medium=1.2)
+        for _ in range(2):
+            gas_params = await gas_estimation.get_gas_price(5.5, TxPriority.Medium)
+            self.assertEqual(gas_params['gasPrice'], gwei(6))
+        self.assertEqual(self.web3.eth.gas_price_calls, 1)
+
+    async def test_cache_hit_checks_upper_bound(self):
+        gas_estimation = self.make_estimation(gwei(5))
+        await gas_estimation.get_gas_price(10, TxPriority.Low)
+        with self.assertRaises(OutOfRangeTransactionFee):
+            await gas_estimation.get_gas_price(4, TxPriority.Low)
+        self.assertEqual(self.web3.eth.gas_price_calls, 1)
+
+    async def test_ttl_expiry(self):
+        gas_estimation = self.make_estimation(gwei(5))
+        await gas_estimation.get_gas_price(10, TxPriority.Low)
+        key, (expires_at, gas_price) = next(iter(gas_estimation._cache.items()))
+        self.assertAlmostEqual(expires_at - time.monotonic(), GasPriceCacheTTL, delta=0.5)
+
+        gas_estimation._cache[key] = (time.monotonic() - 0.1, gas_price)
+        await gas_estimation.get_gas_price(10, TxPriority.Low)
+        self.assertEqual(self.web3.eth.gas_price_calls, 2)
+
+    async def test_hour_boundary_skip(self):
+        gas_estimation = GasEstimation(1, [], GasEstimationMethod.GAS_API_PROVIDER, gas_api_updates_hourly=True)
+        fetch = mock.AsyncMock(return_value=(20.0, 1.0))
+        with mock.patch.object(gas_estimation, '_fetch_gas_from_api', fetch):
+            hour = 1_700_000_000 - 1_700_000_000 % 3600
+            with mock.patch('src.multirpc.gas_estimation.time.time', return_value=hour + 10):
+                await gas_estimation.get_gas_price(100, TxPriority.Low)
+                await gas_estimation.get_gas_price(100, TxPriority.Low)
+            self.assertEqual(fetch.await_count, 2)
+            with mock.patch('src.multirpc.gas_estimation.time.time', return_value=hour + 1000):
+                self.assertEqual(gas_estimation._cache_ttl(GasEstimationMethod.GAS_API_PROVIDER), 2602)
+                await gas_estimation.get_gas_price(100, TxPriority.Low)
+                await gas_estimation.get_gas_price(100, TxPriority.Low)
+            self.assertEqual(fetch.await_count, 3)
+
+    async def test_clear_cache_on_underpriced_transaction(self):
+        gas_estimation = self.make_estimation(gwei(5))
+        await gas_estimation.get_gas_price(10, TxPriority.Low)
+        self.assertTrue(gas_estimation._cache)
+
+        multi_rpc = BaseMultiRpc(NestedDict(), '0x' + '11' * 20, [], gas_estimation=gas_estimation)
+        provider = FakeWeb3(send_error=ValueError('transaction underpriced'))
+        multi_rpc._rpc_labels[id(provider)] = (provider.provider.endpoint_uri, 'label')
+        with self.assertRaises(ValueError):
+            await multi_rpc._send_transaction(provider, b'')
+        self.assertFalse(gas_estimation._cache)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,60 @@
+import unittest
+
+from src.multirpc.utils import NestedDict
+
+
+class TestNestedDict(unittest.TestCase):
+
+    def test_items_keep_insertion_order(self):
+        nested_dict = NestedDict({'a': {1: {'x': 1, 'y': 2}, 2: 3}, 'b': 4, 'c': {}})
+        self.assertEqual(
+            list(nested_dict.items()),
+            [(('a', 1, 'x'), 1), (('a', 1, 'y'), 2), (('a', 2), 3), (('b',), 4)],
+        )
+
+    def test_leaf_and_prefix_lookup(self):
+        nested_dict = NestedDict({'view': {1: ['a'], 2: ['b']}, 'transaction': {1: ['c']}})
+        self.assertEqual(nested_dict['view', 1], ['a'])
+        self.assertEqual(nested_dict['view'], {1: ['a'], 2: ['b']})
+        self.assertEqual(nested_dict.get('transaction'), {1: ['c']})
+        self.assertEqual(nested_dict.get(('view', 2)), ['b'])
+        self.assertIsNone(nested_dict.get(('view', 3)))
+        self.assertIsNone(nested_dict.get(('view', 1, 0)))
+        with self.assertRaises(KeyError):
+            nested_dict['view', 3]  # noqa
+
+    def test_setitem_replaces_none_leaf(self):
+        nested_dict = NestedDict({'transaction': None, 'view': None})
+        nested_dict['view', 1] = ['a']
+        self.assertEqual(list(nested_dict.items()), [(('transaction',), None), (('view', 1), ['a'])])
+        self.assertEqual(nested_dict['view'], {1: ['a']})
+        self.assertIsNone(nested_dict.get('transaction'))
+
+    def test_setitem_replaces_subtree(self):
+        nested_dict = NestedDict({'view': {1: ['a'], 2: ['b']}})
+        nested_dict['view'] = {3: ['c']}
+        self.assertEqual(list(nested_dict.items()), [(('view', 3), ['c'])])
+        self.assertIsNone(nested_dict.get(('view', 1)))
+
+    def test_changes_to_source_dict_are_not_seen(self):
+        data = {'view': {1: ['a']}}
+        nested_dict = NestedDict(data)
+        data['view'][1] = ['b']
+        data['view'][2] = ['c']
+        self.assertEqual(nested_dict['view', 1], ['a'])
+        self.assertEqual(nested_dict['view'], {1: ['a']})
+        self.assertEqual(list(nested_dict.items()), [(('view', 1), ['a'])])
+
+    def test_views_are_read_only(self):
+        nested_dict = NestedDict({'view': {1: ['a']}})
+        with self.assertRaises(TypeError):
+            nested_dict.data['view'][1] = ['b']  # noqa
+        with self.assertRaises(TypeError):
+            nested_dict['view'][2] = ['c']  # noqa
+        nested_dict['view', 2] = ['c']
+        self.assertEqual(nested_dict['view'], {1: ['a'], 2: ['c']})
+        self.assertEqual(nested_dict.data, {'view': {1: ['a'], 2: ['c']}})
+
+
+if __name__ == '__main__':
+    unittest.main()